@@ -5,6 +5,9 @@ import numbers
 import numpy as np
 import pybamm
 
+# Macroscale domains, in the order in which they appear in the cell
+MACROSCALE_DOMAINS = ("negative electrode", "separator", "positive electrode")
+
 
 class Mesh(dict):
     """
@@ -34,19 +37,22 @@ class Mesh(dict):
         for domain in geometry:
             # create mesh generator if just class is passed (will throw an error
             # later if the mesh needed parameters)
-            if not isinstance(
-                submesh_types[domain], pybamm.MeshGenerator
-            ) and issubclass(submesh_types[domain], pybamm.SubMesh):
-                submesh_types[domain] = pybamm.MeshGenerator(submesh_types[domain])
+            submesh_type = submesh_types[domain]
+            if not isinstance(submesh_type, pybamm.MeshGenerator) and issubclass(
+                submesh_type, pybamm.SubMesh
+            ):
+                submesh_type = pybamm.MeshGenerator(submesh_type)
+                submesh_types[domain] = submesh_type
             # Zero dimensional submesh case (only one point)
-            if issubclass(submesh_types[domain].submesh_type, pybamm.SubMesh0D):
+            if issubclass(submesh_type.submesh_type, pybamm.SubMesh0D):
                 submesh_pts[domain] = 1
             # other cases
             else:
                 submesh_pts[domain] = {}
-                if len(list(geometry[domain].keys())) > 3:
+                geom_domain = geometry[domain]
+                if len(geom_domain) > 3:
                     raise pybamm.GeometryError("Too many keys provided")
-                for var in list(geometry[domain].keys()):
+                for var in geom_domain:
                     if var in ["primary", "secondary"]:
                         raise pybamm.GeometryError(
                             "Geometry should no longer be given keys 'primary' or "
@@ -57,10 +63,7 @@ class Mesh(dict):
                         # Raise error if the number of points for a particular
                         # variable haven't been provided, unless that variable
                         # doesn't appear in the geometry
-                        if (
-                            var.id not in var_id_pts.keys()
-                            and var.domain[0] in geometry.keys()
-                        ):
+                        if var.id not in var_id_pts and var.domain[0] in geometry:
                             raise KeyError(
                                 "Points not given for a variable in domain {}".format(
                                     domain
@@ -73,12 +76,12 @@ class Mesh(dict):
         # Input domain order manually
         self.domain_order = []
         # First the macroscale domains, whose order we care about
-        for domain in ["negative electrode", "separator", "positive electrode"]:
+        for domain in MACROSCALE_DOMAINS:
             if domain in geometry:
                 self.domain_order.append(domain)
         # Then the remaining domains
         for domain in geometry:
-            if domain not in ["negative electrode", "separator", "positive electrode"]:
+            if domain not in MACROSCALE_DOMAINS:
                 self.domain_order.append(domain)
 
         # evaluate any expressions in geometry
@@ -126,30 +129,29 @@ class Mesh(dict):
         # If there is just a single submesh, we can return it directly
         if len(submeshnames) == 1:
             return self[submeshnames[0]]
+        submeshes = [self[submeshname] for submeshname in submeshnames]
         # Check that the final edge of each submesh is the same as the first edge of the
         # next submesh
-        for i in range(len(submeshnames) - 1):
-            if self[submeshnames[i]].edges[-1] != self[submeshnames[i + 1]].edges[0]:
-                raise pybamm.DomainError("submesh edges are not aligned")
-
-            coord_sys = self[submeshnames[i]].coord_sys
-            coord_sys_r = self[submeshnames[i + 1]].coord_sys
-            if coord_sys != coord_sys_r:
-                raise pybamm.DomainError(
-                    "trying to combine two meshes in different coordinate systems"
-                )
+        last_edges = np.array([submesh.edges[-1] for submesh in submeshes[:-1]])
+        first_edges = np.array([submesh.edges[0] for submesh in submeshes[1:]])
+        if np.any(last_edges != first_edges):
+            raise pybamm.DomainError("submesh edges are not aligned")
+        # Check that all the submeshes are in the same coordinate system
+        coord_sys = submeshes[0].coord_sys
+        if any(submesh.coord_sys != coord_sys for submesh in submeshes[1:]):
+            raise pybamm.DomainError(
+                "trying to combine two meshes in different coordinate systems"
+            )
         combined_submesh_edges = np.concatenate(
-            [self[submeshnames[0]].edges]
-            + [self[submeshname].edges[1:] for submeshname in submeshnames[1:]]
+            [submeshes[0].edges] + [submesh.edges[1:] for submesh in submeshes[1:]]
         )
-        coord_sys = self[submeshnames[0]].coord_sys
-        submesh = pybamm.SubMesh1D(combined_submesh_edges, coord_sys)
+        combined_submesh = pybamm.SubMesh1D(combined_submesh_edges, coord_sys)
         # add in internal boundaries
-        submesh.internal_boundaries = [
-            self[submeshname].edges[0] for submeshname in submeshnames[1:]
+        combined_submesh.internal_boundaries = [
+            submesh.edges[0] for submesh in submeshes[1:]
         ]
 
-        return submesh
+        return combined_submesh
 
     def add_ghost_meshes(self):
         """
@@ -157,28 +159,39 @@ class Mesh(dict):
         self.submeshclass
         This will be useful for calculating the gradient with Dirichlet BCs.
         """
-        # Get all submeshes relating to space (i.e. exclude time)
-        submeshes = [
-            (domain, submesh)
-            for domain, submesh in self.items()
-            if not isinstance(submesh, (pybamm.SubMesh0D, pybamm.ScikitSubMesh2D))
-        ]
-        for domain, submesh in submeshes:
-
-            edges = submesh.edges
-
-            # left ghost cell: two edges, one node, to the left of existing submesh
-            lgs_edges = np.array([2 * edges[0] - edges[1], edges[0]])
-            self[domain + "_left ghost cell"] = pybamm.SubMesh1D(
-                lgs_edges, submesh.coord_sys
-            )
+        # Get all submeshes relating to space (i.e. exclude time), skipping any ghost
+        # cells that have already been added so that ghost cells are never created
+        # for other ghost cells
+        domains = []
+        coord_systems = []
+        endpoints = []
+        for domain, submesh in self.items():
+            if not isinstance(
+                submesh, (pybamm.SubMesh0D, pybamm.ScikitSubMesh2D)
+            ) and not domain.endswith("ghost cell"):
+                domains.append(domain)
+                coord_systems.append(submesh.coord_sys)
+                # Only the two outermost edges on each side are needed
+                endpoints.append(submesh.edges[[0, 1, -2, -1]])
+        if not domains:
+            return
+
+        # Compute the ghost cell edges for all submeshes at once
+        endpoints = np.array(endpoints)
+        # left ghost cell: two edges, one node, to the left of existing submesh
+        lgs_edges = np.column_stack(
+            [2 * endpoints[:, 0] - endpoints[:, 1], endpoints[:, 0]]
+        )
+        # right ghost cell: two edges, one node, to the right of existing submesh
+        rgs_edges = np.column_stack(
+            [endpoints[:, 3], 2 * endpoints[:, 3] - endpoints[:, 2]]
+        )
 
-            # right ghost cell: two edges, one node, to the right of
-            # existing submesh
-            rgs_edges = np.array([edges[-1], 2 * edges[-1] - edges[-2]])
-            self[domain + "_right ghost cell"] = pybamm.SubMesh1D(
-                rgs_edges, submesh.coord_sys
-            )
+        for domain, coord_sys, lgs, rgs in zip(
+            domains, coord_systems, lgs_edges, rgs_edges
+        ):
+            self[domain + "_left ghost cell"] = pybamm.SubMesh1D(lgs, coord_sys)
+            self[domain + "_right ghost cell"] = pybamm.SubMesh1D(rgs, coord_sys)
 
 
 class SubMesh:
@@ -2,10 +2,26 @@
 # Base model class
 #
 import inspect
+import itertools
 import numbers
 import pybamm
 import warnings
 
+# Bind the classes used in the model checks to module-level names, so that the
+# checks don't look them up on the pybamm module for every node they visit
+from pybamm import (
+    Concatenation,
+    Divergence,
+    Gradient,
+    Integral,
+    StateVector,
+    StateVectorDot,
+    Symbol,
+    Variable,
+    VariableBase,
+    VariableDot,
+)
+
 
 class ParamClass:
     """Class for converting a module of parameters into a class. For pickling."""
@@ -403,13 +419,13 @@ class BaseModel(object):
     def check_for_time_derivatives(self):
         # Check that no variable time derivatives exist in the rhs equations
         for key, eq in self.rhs.items():
-            for node in eq.pre_order():
-                if isinstance(node, pybamm.VariableDot):
+            for node in _preorder_iter(eq):
+                if isinstance(node, VariableDot):
                     raise pybamm.ModelError(
                         "time derivative of variable found "
                         "({}) in rhs equation {}".format(node, key)
                     )
-                if isinstance(node, pybamm.StateVectorDot):
+                if isinstance(node, StateVectorDot):
                     raise pybamm.ModelError(
                         "time derivative of state vector found "
                         "({}) in rhs equation {}".format(node, key)
@@ -417,13 +433,13 @@ class BaseModel(object):
 
         # Check that no variable time derivatives exist in the algebraic equations
         for key, eq in self.algebraic.items():
-            for node in eq.pre_order():
-                if isinstance(node, pybamm.VariableDot):
+            for node in _preorder_iter(eq):
+                if isinstance(node, VariableDot):
                     raise pybamm.ModelError(
                         "time derivative of variable found ({}) in algebraic"
                         "equation {}".format(node, key)
                     )
-                if isinstance(node, pybamm.StateVectorDot):
+                if isinstance(node, StateVectorDot):
                     raise pybamm.ModelError(
                         "time derivative of state vector found ({}) in algebraic"
                         "equation {}".format(node, key)
@@ -441,46 +457,29 @@ class BaseModel(object):
         # For equations we look through the whole expression tree.
         # "Variables" can be Concatenations so we also have to look in the whole
         # expression tree
-        unpacker = pybamm.SymbolUnpacker((pybamm.Variable, pybamm.VariableDot))
-
-        for var, eqn in self.rhs.items():
-            # Find all variables and variabledot objects
-            vars_in_rhs_keys_dict = unpacker.unpack_symbol(var)
-            vars_in_eqns_dict = unpacker.unpack_symbol(eqn)
+        unpacker = pybamm.SymbolUnpacker(VariableBase)
 
-            # Store ids only
-            # Look only for Variable (not VariableDot) in rhs keys
-            vars_in_rhs_keys.update(
-                [
-                    var_id
-                    for var_id, var in vars_in_rhs_keys_dict.items()
-                    if isinstance(var, pybamm.Variable)
-                ]
-            )
-            vars_in_eqns.update(vars_in_eqns_dict.keys())
-        for var, eqn in self.algebraic.items():
-            # Find all variables and variabledot objects
-            vars_in_algebraic_keys_dict = unpacker.unpack_symbol(var)
-            vars_in_eqns_dict = unpacker.unpack_symbol(eqn)
-
-            # Store ids only
-            # Look only for Variable (not VariableDot) in algebraic keys
-            vars_in_algebraic_keys.update(
-                [
+        for equations, vars_in_keys in [
+            (self.rhs, vars_in_rhs_keys),
+            (self.algebraic, vars_in_algebraic_keys),
+        ]:
+            for var, eqn in equations.items():
+                # Store ids only
+                # Look only for Variable (not VariableDot) in rhs and algebraic keys
+                vars_in_keys.update(
                     var_id
-                    for var_id, var in vars_in_algebraic_keys_dict.items()
-                    if isinstance(var, pybamm.Variable)
-                ]
-            )
-            vars_in_eqns.update(vars_in_eqns_dict.keys())
+                    for var_id, var in unpacker.unpack_symbol(var).items()
+                    if isinstance(var, Variable)
+                )
+                # Find all variables and variabledot objects in the equations
+                vars_in_eqns.update(unpacker.unpack_symbol(eqn))
         for var, side_eqn in self.boundary_conditions.items():
             for side, (eqn, typ) in side_eqn.items():
-                vars_in_eqns_dict = unpacker.unpack_symbol(eqn)
-                vars_in_eqns.update(vars_in_eqns_dict.keys())
+                vars_in_eqns.update(unpacker.unpack_symbol(eqn))
 
         # If any keys are repeated between rhs and algebraic then the model is
         # overdetermined
-        if not set(vars_in_rhs_keys).isdisjoint(vars_in_algebraic_keys):
+        if not vars_in_rhs_keys.isdisjoint(vars_in_algebraic_keys):
             raise pybamm.ModelError("model is overdetermined (repeated keys)")
         # If any algebraic keys don't appear in the eqns (or bcs) then the model is
         # overdetermined (but rhs keys can be absent from the eqns, e.g. dcdt = -1 is
@@ -492,21 +491,29 @@ class BaseModel(object):
             raise pybamm.ModelError("model is overdetermined (extra algebraic keys)")
         # If any variables in the equations don't appear in the keys then the model is
         # underdetermined
-        vars_in_keys = vars_in_rhs_keys.union(vars_in_algebraic_keys)
-        extra_variables_in_equations = vars_in_eqns.difference(vars_in_keys)
+        # vars_in_rhs_keys is not needed separately after this, so update it in place
+        vars_in_rhs_keys |= vars_in_algebraic_keys
+        extra_variables_in_equations = vars_in_eqns.difference(vars_in_rhs_keys)
 
         # get ids of external variables
-        external_ids = {var.id for var in self.external_variables}
-        for var in self.external_variables:
-            if isinstance(var, pybamm.Concatenation):
-                child_ids = {child.id for child in var.children}
-                external_ids = external_ids.union(child_ids)
+        external_ids = self._find_external_ids()
 
         extra_variables = extra_variables_in_equations.difference(external_ids)
 
         if extra_variables:
             raise pybamm.ModelError("model is underdetermined (too many variables)")
 
+    def _find_external_ids(self):
+        """
+        Find the ids of the external variables, including the ids of the children of
+        any external variables that are concatenations
+        """
+        external_ids = {var.id for var in self.external_variables}
+        for var in self.external_variables:
+            if isinstance(var, Concatenation):
+                external_ids.update(child.id for child in var.children)
+        return external_ids
+
     def check_algebraic_equations(self, post_discretisation):
         """
         Check that the algebraic equations are well-posed.
@@ -515,21 +522,21 @@ class BaseModel(object):
         equation
         """
         vars_in_bcs = set()
-        unpacker = pybamm.SymbolUnpacker(pybamm.Variable)
+        unpacker = pybamm.SymbolUnpacker(VariableBase)
         for side_eqn in self.boundary_conditions.values():
-            all_vars = unpacker.unpack_list_of_symbols(
-                [eqn for eqn, _ in side_eqn.values()]
-            )
-            vars_in_bcs.update(all_vars.keys())
+            for eqn, _ in side_eqn.values():
+                vars_in_bcs.update(unpacker.unpack_symbol(eqn))
         if not post_discretisation:
             # After the model has been defined, each algebraic equation key should
             # appear in that algebraic equation, or in the boundary conditions
             # this has been relaxed for concatenations for now
+            # The unpacker caches the variables found in each subtree, so subtrees
+            # shared with the boundary conditions are only traversed once
             for var, eqn in self.algebraic.items():
                 if not (
-                    any(x.id == var.id for x in eqn.pre_order())
+                    var.id in unpacker.unpack_symbol(eqn)
                     or var.id in vars_in_bcs
-                    or isinstance(var, pybamm.Concatenation)
+                    or isinstance(var, Concatenation)
                 ):
                     raise pybamm.ModelError(
                         "each variable in the algebraic eqn keys must appear in the eqn"
@@ -539,7 +546,7 @@ class BaseModel(object):
             # with the state vectors in the algebraic equations. Instead, we check
             # that each algebraic equation contains some StateVector
             for eqn in self.algebraic.values():
-                if not eqn.has_symbol_of_classes(pybamm.StateVector):
+                if not eqn.has_symbol_of_classes(StateVector):
                     raise pybamm.ModelError(
                         "each algebraic equation must contain at least one StateVector"
                     )
@@ -554,19 +561,23 @@ class BaseModel(object):
                 )
 
         # Boundary conditions
-        for var, eqn in {**self.rhs, **self.algebraic}.items():
-            if eqn.has_symbol_of_classes(
-                (pybamm.Gradient, pybamm.Divergence)
-            ) and not eqn.has_symbol_of_classes(pybamm.Integral):
+        # Collect the ids of all symbols in the boundary condition keys once, rather
+        # than searching through every key for each variable
+        ids_in_bcs_keys = {
+            x.id
+            for symbol in self.boundary_conditions.keys()
+            for x in _preorder_iter(symbol)
+        }
+        for var, eqn in itertools.chain(self.rhs.items(), self.algebraic.items()):
+            has_spatial_operator, has_integral = _has_symbols_of_classes(
+                eqn, (Gradient, Divergence), Integral
+            )
+            if has_spatial_operator and not has_integral:
                 # I have relaxed this check for now so that the lumped temperature
                 # equation doesn't raise errors (this has and average in it)
 
                 # Variable must be in the boundary conditions
-                if not any(
-                    var.id == x.id
-                    for symbol in self.boundary_conditions.keys()
-                    for x in symbol.pre_order()
-                ):
+                if var.id not in ids_in_bcs_keys:
                     raise pybamm.ModelError(
                         "no boundary condition given for "
                         "variable '{}' with equation '{}'.".format(var, eqn)
@@ -591,23 +602,25 @@ class BaseModel(object):
                 del self._variables[output]
 
     def check_variables(self):
-        # Create list of all Variable nodes that appear in the model's list of variables
-        unpacker = pybamm.SymbolUnpacker(pybamm.Variable)
-        all_vars = unpacker.unpack_list_of_symbols(self.variables.values())
+        # Create dict of all Variable nodes that appear in the model's list of variables
+        # Subtrees shared between variables are only visited once
+        all_vars = {}
+        visited_ids = set()
+        for eqn in self.variables.values():
+            for var in _iter_variables(eqn, visited_ids):
+                all_vars[var.id] = var
 
         var_ids_in_keys = set()
 
-        model_and_external_variables = (
-            list(self.rhs.keys())
-            + list(self.algebraic.keys())
-            + self.external_variables
+        model_and_external_variables = itertools.chain(
+            self.rhs.keys(), self.algebraic.keys(), self.external_variables
         )
 
         for var in model_and_external_variables:
-            if isinstance(var, pybamm.Variable):
+            if isinstance(var, Variable):
                 var_ids_in_keys.add(var.id)
             # Key can be a concatenation
-            elif isinstance(var, pybamm.Concatenation):
+            elif isinstance(var, Concatenation):
                 var_ids_in_keys.update([child.id for child in var.children])
 
         for var_id, var in all_vars.items():
@@ -677,6 +690,71 @@ class BaseModel(object):
             return pybamm.CasadiSolver(mode="safe")
 
 
+def _preorder_iter(expr):
+    """
+    Iterate over all the nodes in an expression tree in pre-order, using an explicit
+    stack rather than the recursive generators of :meth:`pybamm.Symbol.pre_order`.
+    """
+    stack = [expr]
+    while stack:
+        node = stack.pop()
+        yield node
+        # push children in reverse so that they are visited from left to right
+        stack.extend(reversed(node.children))
+
+
+def _iter_variables(expr, visited_ids=None):
+    """
+    Iterate over all the :class:`pybamm.Variable` nodes in an expression tree, using
+    an explicit stack instead of a recursive generator. Nodes whose id is already in
+    `visited_ids` are skipped along with their children, and the ids of the nodes
+    visited are added to `visited_ids`.
+    """
+    if visited_ids is None:
+        visited_ids = set()
+    stack = [expr]
+    while stack:
+        node = stack.pop()
+        if node.id in visited_ids:
+            continue
+        visited_ids.add(node.id)
+        if isinstance(node, Variable):
+            yield node
+        stack.extend(node.children)
+
+
+def _has_symbols_of_classes(expr, *symbol_classes):
+    """
+    Check, in a single traversal of an expression tree, whether it has a term of each
+    of the class(es) in `symbol_classes`. Equivalent to calling
+    :meth:`pybamm.Symbol.has_symbol_of_classes` separately for each entry.
+
+    Parameters
+    ----------
+    expr : :class:`pybamm.Symbol`
+        The expression tree to search
+    symbol_classes : pybamm classes or tuples of classes
+        The classes to test the nodes of the tree against
+
+    Returns
+    -------
+    list of bool
+        For each entry in `symbol_classes`, whether the tree has a term of that
+        class (or of one of those classes)
+    """
+    found = [False] * len(symbol_classes)
+    n_missing = len(symbol_classes)
+    for node in _preorder_iter(expr):
+        for i, classes in enumerate(symbol_classes):
+            if not found[i] and isinstance(node, classes):
+                found[i] = True
+                n_missing -= 1
+        # stop as soon as a term of every class has been found
+        if n_missing == 0:
+            break
+    return found
+
+
 # helper functions for finding symbols
 def find_symbol_in_tree(tree, name):
     if name == tree.name:
@@ -723,23 +801,22 @@ class EquationDict(dict):
         and check that domains are consistent
         """
         # Convert any numbers to a pybamm.Scalar
+        # Most equations are already symbols, so check for that first as it is much
+        # cheaper than an isinstance check against the abstract numbers.Number
         for var, eqn in equations.items():
-            if isinstance(eqn, numbers.Number):
+            if not isinstance(eqn, Symbol) and isinstance(eqn, numbers.Number):
                 equations[var] = pybamm.Scalar(eqn)
 
-        if not all(
-            [
-                variable.domain == equation.domain
-                or variable.domain == []
-                or equation.domain == []
-                for variable, equation in equations.items()
-            ]
-        ):
-            raise pybamm.DomainError(
-                "variable and equation in '{}' must have the same domain".format(
-                    self.name
+        # Check domains, stopping at the first mismatch
+        for variable, equation in equations.items():
+            var_domain = variable.domain
+            eqn_domain = equation.domain
+            if not (var_domain == eqn_domain or var_domain == [] or eqn_domain == []):
+                raise pybamm.DomainError(
+                    "variable and equation in '{}' must have the same domain".format(
+                        self.name
+                    )
                 )
-            )
 
         # For initial conditions, check that the equation doesn't contain any
         # Variable objects
@@ -747,8 +824,8 @@ class EquationDict(dict):
         # after pickling)
         if hasattr(self, "name") and self.name == "initial_conditions":
             for var, eqn in equations.items():
-                if eqn.has_symbol_of_classes(pybamm.Variable):
-                    unpacker = pybamm.SymbolUnpacker(pybamm.Variable)
+                if eqn.has_symbol_of_classes(Variable):
+                    unpacker = pybamm.SymbolUnpacker(Variable)
                     variable_in_equation = list(unpacker.unpack_symbol(eqn).values())[0]
                     raise TypeError(
                         "Initial conditions cannot contain 'Variable' objects, "
@@ -778,7 +855,7 @@ class BoundaryConditionsDict(dict):
         # Convert any numbers to a pybamm.Scalar
         for var, bcs in boundary_conditions.items():
             for side, bc in bcs.items():
-                if isinstance(bc[0], numbers.Number):
+                if not isinstance(bc[0], Symbol) and isinstance(bc[0], numbers.Number):
                     # typ is the type of the bc, e.g. "Dirichlet" or "Neumann"
                     eqn, typ = boundary_conditions[var][side]
                     boundary_conditions[var][side] = (pybamm.Scalar(eqn), typ)
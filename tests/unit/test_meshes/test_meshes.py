@@ -247,6 +247,12 @@ class TestMesh(unittest.TestCase):
             mesh["positive electrode"].edges[-1],
         )
 
+        # adding ghost meshes again should not create ghost cells of ghost cells
+        n_submeshes = len(mesh)
+        mesh.add_ghost_meshes()
+        self.assertEqual(len(mesh), n_submeshes)
+        self.assertNotIn("negative electrode_left ghost cell_left ghost cell", mesh)
+
     def test_mesh_coord_sys(self):
         param = pybamm.ParameterValues(
             values={
@@ -3,6 +3,7 @@
 #
 import pybamm
 import unittest
+from pybamm.models.base_model import _has_symbols_of_classes
 
 
 class TestBaseModel(unittest.TestCase):
@@ -259,6 +260,19 @@ class TestBaseModel(unittest.TestCase):
         with self.assertRaisesRegex(pybamm.ModelError, "underdetermined"):
             model.check_well_posedness()
 
+        # Well-determined if the missing variables are external variables
+        model.external_variables = [d, e]
+        model.check_well_posedness()
+        # Underdetermined again after resetting the external variables
+        model.external_variables = []
+        with self.assertRaisesRegex(pybamm.ModelError, "underdetermined"):
+            model.check_well_posedness()
+        # Well-determined again after adding the external variables in place
+        model.external_variables.append(d)
+        model.external_variables.extend([e])
+        model.check_well_posedness()
+        model.external_variables.clear()
+
         # Overdetermined model - repeated keys
         model.algebraic = {c: c - d, d: e + d}
         with self.assertRaisesRegex(pybamm.ModelError, "overdetermined"):
@@ -415,6 +429,68 @@ class TestBaseModel(unittest.TestCase):
         with self.assertRaisesRegex(pybamm.ModelError, "boundary condition"):
             model.check_well_posedness()
 
+    def test_check_well_posedness_repeated(self):
+        whole_cell = ["negative electrode", "separator", "positive electrode"]
+        c = pybamm.Variable("c", domain=whole_cell)
+        d = pybamm.Variable("d", domain=whole_cell)
+        e = pybamm.Variable("e", domain=whole_cell)
+
+        # Underdetermined model: d is not a key
+        model = pybamm.BaseModel()
+        eqn = -c + d
+        model.rhs = {c: eqn}
+        model.initial_conditions = {c: 1}
+        with self.assertRaisesRegex(pybamm.ModelError, "underdetermined"):
+            model.check_well_posedness()
+
+        # Checking the same equations again once d has been added passes
+        model.rhs[d] = -d
+        model.initial_conditions[d] = 2
+        model.check_well_posedness()
+        model.check_well_posedness()
+
+        # A new expression built from an already checked one is checked against its
+        # own variables
+        model.rhs = {c: eqn * e, d: -d}
+        with self.assertRaisesRegex(pybamm.ModelError, "underdetermined"):
+            model.check_well_posedness()
+        model.algebraic = {e: e - eqn}
+        model.check_well_posedness()
+
+    def test_has_symbols_of_classes(self):
+        a = pybamm.Variable("a", domain=["negative electrode"])
+        x = pybamm.SpatialVariable("x", ["negative electrode"])
+        spatial_operators = (pybamm.Gradient, pybamm.Divergence)
+
+        # Only a gradient
+        expr = pybamm.grad(a)
+        self.assertEqual(
+            _has_symbols_of_classes(expr, spatial_operators, pybamm.Integral),
+            [True, False],
+        )
+        self.assertEqual(
+            _has_symbols_of_classes(expr, pybamm.Gradient, pybamm.Integral),
+            [True, False],
+        )
+
+        # Both a gradient and an integral
+        expr = pybamm.grad(a) + pybamm.Integral(a, x)
+        self.assertEqual(
+            _has_symbols_of_classes(expr, spatial_operators, pybamm.Integral),
+            [True, True],
+        )
+        self.assertEqual(
+            _has_symbols_of_classes(expr, pybamm.Integral, pybamm.Gradient),
+            [True, True],
+        )
+
+        # Neither
+        expr = 2 * a + 1
+        self.assertEqual(
+            _has_symbols_of_classes(expr, spatial_operators, pybamm.Integral),
+            [False, False],
+        )
+
     def test_check_well_posedness_output_variables(self):
         model = pybamm.BaseModel()
         whole_cell = ["negative electrode", "separator", "positive electrode"]